@@ -0,0 +1,186 @@
+# paper_search_mcp/academic_platforms/pdf_utils.py
+"""
+PDF 文本提取工具
+
+- pdf_to_markdown: 单个 PDF -> Markdown（模块级函数，可被子进程 pickle）
+- pdf_to_text: 单个 PDF -> 纯文本（不做版面分析，速度快一个数量级）
+- extract_many: 使用进程池并行提取多个 PDF
+
+PyMuPDF 解析是 CPU 密集型任务，批量处理时用多进程绕开 GIL。
+提取结果按文件内容哈希缓存在进程内，重复读取同一 PDF 时直接返回。
+"""
+from collections import OrderedDict
+from typing import Dict, List, Literal, Optional, Tuple
+import os
+import sys
+import threading
+import logging
+
+import xxhash
+
+logger = logging.getLogger(__name__)
+
+# 提取失败时返回的文本前缀（只按完整前缀判断，正文以 "Error" 开头的论文不会被误判）
+EXTRACTION_ERROR_PREFIX = "Error extracting text: "
+
+# 提取结果 LRU 缓存：(文件内容 xxh3_64, 输出格式) -> 文本
+EXTRACTION_CACHE_SIZE = 64
+_EXTRACTION_CACHE: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_EXTRACTION_CACHE_LOCK = threading.Lock()
+
+
+def default_num_workers() -> int:
+    """默认进程数：CPU 核数，最多 4（PyMuPDF 超过 4-6 个进程收益很小）"""
+    return min(os.cpu_count() or 1, 4)
+
+
+def pdf_to_markdown(pdf_path: str) -> Tuple[str, str]:
+    """提取单个 PDF 的 Markdown 文本
+
+    Returns:
+        (pdf_path, text)；失败时 text 为 "Error extracting text: ..."
+    """
+    # 延迟导入：PyMuPDF 体积大、导入慢，只在真正提取时加载
+    import pymupdf4llm
+    
+    try:
+        return pdf_path, pymupdf4llm.to_markdown(pdf_path, show_progress=False)
+    except Exception as e:
+        return pdf_path, f"{EXTRACTION_ERROR_PREFIX}{e}"
+
+
+def pdf_to_text(pdf_path: str) -> Tuple[str, str]:
+    """提取单个 PDF 的纯文本
+
+    只调用 page.get_text()，跳过 pymupdf4llm 的版面分析和表格检测，
+    但会丢失表格、标题等结构。
+
+    Returns:
+        (pdf_path, text)；失败时 text 为 "Error extracting text: ..."
+    """
+    import pymupdf
+    
+    try:
+        with pymupdf.open(pdf_path) as doc:
+            return pdf_path, "\n\n".join(page.get_text("text") for page in doc)
+    except Exception as e:
+        return pdf_path, f"{EXTRACTION_ERROR_PREFIX}{e}"
+
+
+# 输出格式 -> 提取函数（模块级函数，可被子进程 pickle）
+_EXTRACTORS = {
+    "markdown": pdf_to_markdown,
+    "text": pdf_to_text,
+}
+
+
+def _hash_of_file(pdf_path: str) -> Optional[str]:
+    """计算文件内容的 xxh3_64 摘要（文件不可读时返回 None）"""
+    hasher = xxhash.xxh3_64()
+    try:
+        with open(pdf_path, "rb") as f:
+            while block := f.read(1 << 20):
+                hasher.update(block)
+    except OSError:
+        return None
+    return hasher.hexdigest()
+
+
+def _get_cached_text(key: Tuple[str, str]) -> Optional[str]:
+    """读取提取缓存（命中时标记为最近使用）"""
+    with _EXTRACTION_CACHE_LOCK:
+        text = _EXTRACTION_CACHE.get(key)
+        if text is not None:
+            _EXTRACTION_CACHE.move_to_end(key)
+        return text
+
+
+def _cache_text(key: Tuple[str, str], text: str) -> None:
+    """写入提取缓存，超出上限时淘汰最久未使用的条目（错误信息不缓存）"""
+    if text.startswith(EXTRACTION_ERROR_PREFIX):
+        return
+    with _EXTRACTION_CACHE_LOCK:
+        _EXTRACTION_CACHE[key] = text
+        _EXTRACTION_CACHE.move_to_end(key)
+        while len(_EXTRACTION_CACHE) > EXTRACTION_CACHE_SIZE:
+            _EXTRACTION_CACHE.popitem(last=False)
+
+
+def extract_pdf(
+    pdf_path: str,
+    output_format: Literal["markdown", "text"] = "markdown"
+) -> str:
+    """按输出格式提取单个 PDF 的文本（失败时返回错误信息）
+
+    同一内容的 PDF 再次提取时直接返回缓存结果。
+    """
+    digest = _hash_of_file(pdf_path)
+    if digest is None:
+        return _EXTRACTORS[output_format](pdf_path)[1]
+
+    key = (digest, output_format)
+    cached = _get_cached_text(key)
+    if cached is not None:
+        return cached
+
+    text = _EXTRACTORS[output_format](pdf_path)[1]
+    _cache_text(key, text)
+    return text
+
+
+def extract_many(
+    pdf_paths: List[str],
+    num_workers: Optional[int] = None,
+    output_format: Literal["markdown", "text"] = "markdown"
+) -> Dict[str, str]:
+    """使用进程池并行提取多个 PDF
+
+    Args:
+        pdf_paths: PDF 文件路径列表
+        num_workers: 进程数（默认 default_num_workers()）
+        output_format: 输出格式
+            - "markdown": Markdown 格式（保留表格和标题结构）
+            - "text": 纯文本格式（更快，丢失表格和标题结构）
+
+    Returns:
+        {pdf_path: text}
+    """
+    if not pdf_paths:
+        return {}
+
+    # 先查缓存，只把未命中的 PDF 交给进程池
+    results = {}
+    keys = {}
+    for path in pdf_paths:
+        digest = _hash_of_file(path)
+        if digest is not None:
+            keys[path] = (digest, output_format)
+            cached = _get_cached_text(keys[path])
+            if cached is not None:
+                results[path] = cached
+    pending = [path for path in dict.fromkeys(pdf_paths) if path not in results]
+    if not pending:
+        return results
+
+    extractor = _EXTRACTORS[output_format]
+    num_workers = min(num_workers or default_num_workers(), len(pending))
+    if num_workers <= 1:
+        extracted = dict(extractor(path) for path in pending)
+    else:
+        # 延迟导入：只有批量提取才需要进程池
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+        
+        # macOS/Windows 上 fork 不安全，使用 spawn
+        mp_context = multiprocessing.get_context("spawn") if sys.platform in ("darwin", "win32") else None
+
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context) as executor:
+            extracted = dict(executor.map(extractor, pending, chunksize=2))
+
+        logger.info(f"Extracted {len(extracted)} PDFs with {num_workers} workers")
+
+    for path, text in extracted.items():
+        if path in keys:
+            _cache_text(keys[path], text)
+    results.update(extracted)
+    return results
@@ -7,23 +7,63 @@ SciHubFetcher - Sci-Hub PDF 下载器
 注意：Sci-Hub 的使用可能在某些地区受到法律限制。
 请确保您在使用前了解当地法律法规。
 """
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import re
 import hashlib
 import logging
 import os
-import subprocess
+import queue
 import shutil
-from typing import Optional
+import threading
+from typing import List, Literal, Optional, Tuple
 from datetime import datetime
 
 import requests
-from bs4 import BeautifulSoup
-import pymupdf4llm
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax 不可用时回退到 BeautifulSoup
+    LexborHTMLParser = None
+
+from .pdf_utils import EXTRACTION_ERROR_PREFIX, default_num_workers, extract_many, extract_pdf
 
 logger = logging.getLogger(__name__)
 
 
+# 页面只读取前 200 KB：PDF 链接总在页面前部，避免下载体积大的内嵌脚本
+_MAX_PAGE_BYTES = 200_000
+
+# 预编译正则
+_ONCLICK_RE = re.compile(r"location\.href='([^']+)'")
+# Sci-Hub 页面模板固定：embed / iframe / onclick 中的 .pdf 链接，直接在原始字节上匹配
+_SCIHUB_PDF_RE = re.compile(
+    rb'(?:<embed[^>]*type=["\']application/pdf["\'][^>]*src=|<iframe[^>]*src=|location\.href=)'
+    rb'["\']([^"\'\s]+\.pdf[^"\']*)',
+    re.I
+)
+
+
+class _FilenameTable(dict):
+    """str.translate 转换表：保留 \\w、'-'、'.'，其他字符替换为 '_'
+
+    与 re.sub(r'[^\\w\\-_.]', '_', s) 结果一致；按需计算并缓存每个字符的映射。
+    """
+
+    def __missing__(self, code: int):
+        char = chr(code)
+        value = code if char.isalnum() or char in '_-.' else '_'
+        self[code] = value
+        return value
+
+
+_FILENAME_TABLE = _FilenameTable()
+
+
 # Sci-Hub 可用镜像列表（按可用性排序，2024/2025 更新）
 SCIHUB_MIRRORS = [
     "https://sci-hub.ru",
@@ -45,18 +85,24 @@ class SciHubFetcher:
     
     环境变量：
     - SCIHUB_MIRROR: 自定义 Sci-Hub 镜像地址
+    - USE_CURL_FALLBACK: requests 下载失败时回退到 curl
+    
+    同时请求 SCIHUB_MIRRORS 中的所有镜像，采用最先找到文章的镜像；
+    所有镜像共用同一个 Session，连接池按主机保持 keep-alive 连接。
     """
 
     def __init__(
         self, 
         base_url: Optional[str] = None, 
-        timeout: int = 30
+        timeout: int = 30,
+        prewarm: bool = False
     ):
         """初始化 Sci-Hub 下载器
         
         Args:
             base_url: Sci-Hub 镜像地址（默认从环境变量或使用默认镜像）
             timeout: 请求超时时间
+            prewarm: 是否在后台预先连接所有镜像（建立 TCP/TLS 连接）
         """
         self.base_url = (
             base_url or 
@@ -64,22 +110,54 @@ class SciHubFetcher:
             SCIHUB_MIRRORS[0]
         ).rstrip("/")
         self.timeout = timeout
+        # 首选镜像在前，其余镜像作为回退
+        self._mirrors = [self.base_url] + [m for m in SCIHUB_MIRRORS if m != self.base_url]
+        self._mirror_lock = threading.Lock()
         
         self.session = requests.Session()
+        # 只对 502/503/504 状态码重试；连接/读取超时不在适配器层重试，
+        # 否则会与 download_pdf 的重试循环、镜像故障转移叠加成数倍的超时等待
+        adapter = HTTPAdapter(
+            pool_connections=16,  # 镜像 + PDF 存储主机
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                connect=0,
+                read=False,
+                other=0,
+                backoff_factor=0.5,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.session.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            # gzip/deflate，安装 brotli 时额外支持 br（由 urllib3 负责解压）
+            'Accept-Encoding': ACCEPT_ENCODING,
             'DNT': '1',
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
         }
         
         logger.info(f"SciHub initialized with mirror: {self.base_url}")
+        
+        if prewarm:
+            threading.Thread(target=self.warm_up, daemon=True).start()
+
+    def warm_up(self) -> None:
+        """向所有镜像发送 HEAD 请求，预先建立 keep-alive 连接"""
+        for mirror in self._mirrors:
+            try:
+                self.session.head(mirror, verify=False, timeout=5)
+            except requests.exceptions.RequestException as e:
+                logger.debug(f"Warm-up failed for {mirror}: {e}")
 
     def _download_with_curl(self, url: str, file_path: str) -> bool:
-        """使用 curl 下载 PDF（更可靠）
+        """使用 curl 下载 PDF（仅在设置 USE_CURL_FALLBACK 时作为最后手段）
         
         Args:
             url: PDF URL
@@ -88,6 +166,9 @@ class SciHubFetcher:
         Returns:
             是否成功
         """
+        # 延迟导入：只有 curl 回退时才需要
+        import subprocess
+        
         if not shutil.which('curl'):
             return False
         
@@ -142,7 +223,8 @@ class SciHubFetcher:
     def download_pdf(self, doi: str, save_path: Optional[str] = None) -> str:
         """通过 DOI 下载论文 PDF
         
-        优先使用 curl（更可靠），失败时回退到 requests。
+        使用 requests 流式下载（复用连接池）；设置 USE_CURL_FALLBACK 时，
+        失败后再尝试 curl（适用于 TLS 配置异常的服务器）。
         
         Args:
             doi: 论文 DOI（如 "10.1038/nature12373"）
@@ -166,44 +248,42 @@ class SciHubFetcher:
                 return f"Error: Could not find PDF for DOI {doi} on Sci-Hub"
             
             # 生成文件路径
-            clean_doi = re.sub(r'[^\w\-_.]', '_', doi)
+            clean_doi = doi.translate(_FILENAME_TABLE)
             file_path = output_dir / f"scihub_{clean_doi}.pdf"
             
-            # 方法1: 优先使用 curl（更可靠）
-            if self._download_with_curl(pdf_url, str(file_path)):
-                return str(file_path)
-            
-            logger.info("curl failed, falling back to requests...")
-            
-            # 方法2: 回退到 requests（带重试）
+            # 方法1: requests（复用 Session 连接池，带重试）
             max_retries = 3
             for attempt in range(max_retries):
                 try:
-                    response = self.session.get(
+                    with self.session.get(
                         pdf_url, 
                         verify=False, 
                         timeout=(30, 180),  # 连接 30s，读取 180s
                         stream=True
-                    )
-                    
-                    if response.status_code != 200:
-                        logger.warning(f"Download failed with status {response.status_code}")
-                        continue
-                    
-                    # 流式写入
-                    with open(file_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    # 验证是 PDF
-                    with open(file_path, 'rb') as f:
-                        header = f.read(4)
-                    
-                    if header != b'%PDF':
-                        logger.warning("Downloaded file is not a PDF")
-                        os.remove(file_path)
-                        continue
+                    ) as response:
+                        if response.status_code != 200:
+                            logger.warning(f"Download failed with status {response.status_code}")
+                            continue
+                        
+                        # 只读取前 4 字节验证是 PDF，不读取 HTML 错误页的正文
+                        magic = response.raw.read(4, decode_content=True)
+                        if magic != b'%PDF':
+                            content_type = response.headers.get('Content-Type', '')
+                            logger.warning(f"Downloaded content is not a PDF (Content-Type: {content_type})")
+                            continue
+                        
+                        # 流式写入（1 MiB 块，直接从底层流复制）
+                        # 先写入 .part 临时文件，完整下载后再改名，中途出错不留下残缺的 PDF
+                        response.raw.decode_content = True
+                        part_path = file_path.with_name(file_path.name + '.part')
+                        try:
+                            with open(part_path, 'wb') as f:
+                                f.write(magic)
+                                shutil.copyfileobj(response.raw, f, 1 << 20)
+                        except BaseException:
+                            part_path.unlink(missing_ok=True)
+                            raise
+                        os.replace(part_path, file_path)
                     
                     logger.info(f"PDF downloaded with requests: {file_path}")
                     return str(file_path)
@@ -213,21 +293,35 @@ class SciHubFetcher:
                 except Exception as e:
                     logger.warning(f"Download error (attempt {attempt + 1}/{max_retries}): {e}")
             
+            # 方法2: curl（最后手段，需显式开启）
+            if os.environ.get('USE_CURL_FALLBACK'):
+                logger.info("requests failed, falling back to curl...")
+                if self._download_with_curl(pdf_url, str(file_path)):
+                    return str(file_path)
+            
             return f"Error: Could not download PDF for DOI {doi}"
             
         except Exception as e:
             logger.error(f"Download failed for {doi}: {e}")
             return f"Error downloading PDF: {e}"
 
-    def read_paper(self, doi: str, save_path: Optional[str] = None) -> str:
+    def read_paper(
+        self,
+        doi: str,
+        save_path: Optional[str] = None,
+        output_format: Literal["markdown", "text"] = "markdown"
+    ) -> str:
         """下载并提取论文文本
         
         Args:
             doi: 论文 DOI
             save_path: 保存目录
+            output_format: 输出格式
+                - "markdown": Markdown 格式（推荐，包含表格）
+                - "text": 纯文本格式（快得多，但丢失表格和标题结构）
             
         Returns:
-            提取的 Markdown 文本或错误信息
+            提取的文本或错误信息
         """
         # 先下载 PDF
         result = self.download_pdf(doi, save_path)
@@ -235,26 +329,72 @@ class SciHubFetcher:
             return result
         
         pdf_path = result
+        text = extract_pdf(pdf_path, output_format)
+        return self._format_paper_text(doi, pdf_path, text)
+
+    def read_papers(
+        self,
+        dois: List[str],
+        save_path: Optional[str] = None,
+        num_workers: Optional[int] = None,
+        output_format: Literal["markdown", "text"] = "markdown"
+    ) -> List[str]:
+        """批量下载并提取论文文本
         
-        try:
-            text = pymupdf4llm.to_markdown(pdf_path, show_progress=False)
-            logger.info(f"Extracted {len(text)} characters from {pdf_path}")
-            
-            if not text.strip():
-                return f"PDF downloaded to {pdf_path}, but no text could be extracted."
-            
-            # 添加元数据
-            metadata = f"# Paper: {doi}\n\n"
-            metadata += f"**DOI**: https://doi.org/{doi}\n"
-            metadata += f"**PDF**: {pdf_path}\n"
-            metadata += f"**Source**: Sci-Hub\n\n"
-            metadata += "---\n\n"
-            
-            return metadata + text
+        PDF 用线程池并发下载，再交给进程池并行提取文本。
+        
+        Args:
+            dois: 论文 DOI 列表
+            save_path: 保存目录
+            num_workers: 下载线程数和提取进程数（默认 CPU 核数，最多 4）
+            output_format: 输出格式（同 read_paper）
             
-        except Exception as e:
-            logger.error(f"Failed to extract text: {e}")
-            return f"Error extracting text: {e}"
+        Returns:
+            与 dois 一一对应的文本或错误信息
+        """
+        if not dois:
+            return []
+        
+        # 重复 DOI 只下载一次（否则多个线程会同时写入同一个文件）
+        unique_dois = list(dict.fromkeys(doi.strip() for doi in dois))
+        
+        num_workers = num_workers or default_num_workers()
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            pdf_paths = list(executor.map(
+                lambda doi: self.download_pdf(doi, save_path), unique_dois
+            ))
+        
+        texts = extract_many(
+            [path for path in pdf_paths if not path.startswith("Error")],
+            num_workers,
+            output_format
+        )
+        
+        results = {
+            doi: pdf_path if pdf_path.startswith("Error")
+            else self._format_paper_text(doi, pdf_path, texts[pdf_path])
+            for doi, pdf_path in zip(unique_dois, pdf_paths)
+        }
+        return [results[doi.strip()] for doi in dois]
+
+    def _format_paper_text(self, doi: str, pdf_path: str, text: str) -> str:
+        """为提取的文本添加元数据"""
+        if text.startswith(EXTRACTION_ERROR_PREFIX):
+            logger.error(f"Failed to extract text from {pdf_path}: {text}")
+            return text
+        
+        logger.info(f"Extracted {len(text)} characters from {pdf_path}")
+        if not text.strip():
+            return f"PDF downloaded to {pdf_path}, but no text could be extracted."
+        
+        # 添加元数据
+        metadata = f"# Paper: {doi}\n\n"
+        metadata += f"**DOI**: https://doi.org/{doi}\n"
+        metadata += f"**PDF**: {pdf_path}\n"
+        metadata += f"**Source**: Sci-Hub\n\n"
+        metadata += "---\n\n"
+        
+        return metadata + text
 
     def _get_pdf_url(self, doi: str) -> Optional[str]:
         """从 Sci-Hub 获取 PDF 直链"""
@@ -263,61 +403,33 @@ class SciHubFetcher:
             if doi.endswith('.pdf'):
                 return doi
             
-            search_url = f"{self.base_url}/{doi}"
-            response = self.session.get(search_url, verify=False, timeout=self.timeout)
-            
-            if response.status_code != 200:
-                logger.warning(f"Sci-Hub returned status {response.status_code}")
+            result = self._fetch_page(doi)
+            if result is None:
                 return None
+            mirror, page = result
             
             # 检查是否找到文章
-            if "article not found" in response.text.lower():
+            if b"article not found" in page.lower():
                 logger.warning(f"Article not found on Sci-Hub: {doi}")
                 return None
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # 方法 1: embed 标签（现代 Sci-Hub 最常用）
-            embed = soup.find('embed', {'type': 'application/pdf'})
-            logger.debug(f"Found embed tag: {embed}")
-            if embed:
-                src = embed.get('src') if hasattr(embed, 'get') else None
-                logger.debug(f"Embed src: {src}")
-                if src and isinstance(src, str):
-                    pdf_url = self._normalize_url(src)
-                    logger.debug(f"Returning PDF URL from embed: {pdf_url}")
-                    return pdf_url
-            
-            # 方法 2: iframe（回退方案）
-            iframe = soup.find('iframe')
-            if iframe:
-                src = iframe.get('src') if hasattr(iframe, 'get') else None
-                if src and isinstance(src, str):
-                    pdf_url = self._normalize_url(src)
-                    logger.debug(f"Returning PDF URL from iframe: {pdf_url}")
-                    return pdf_url
+            # 快速路径：正则直接匹配，无需构建 DOM
+            match = _SCIHUB_PDF_RE.search(page)
+            if match:
+                pdf_url = self._normalize_url(match.group(1).decode(), mirror)
+                logger.debug(f"Returning PDF URL from regex: {pdf_url}")
+                return pdf_url
             
-            # 方法 3: 下载按钮的 onclick
-            for button in soup.find_all('button'):
-                onclick = button.get('onclick', '') if hasattr(button, 'get') else ''
-                if isinstance(onclick, str) and 'pdf' in onclick.lower():
-                    match = re.search(r"location\.href='([^']+)'", onclick)
-                    if match:
-                        pdf_url = self._normalize_url(match.group(1))
-                        logger.debug(f"Returning PDF URL from button: {pdf_url}")
-                        return pdf_url
+            # 回退：页面布局变化时解析 DOM
+            if LexborHTMLParser is not None:
+                link = self._find_pdf_link_lexbor(page)
+            else:
+                link = self._find_pdf_link_bs4(page)
             
-            # 方法 4: 直接下载链接
-            for link in soup.find_all('a'):
-                href = link.get('href', '') if hasattr(link, 'get') else ''
-                if isinstance(href, str) and href and ('pdf' in href.lower() or href.endswith('.pdf')):
-                    if href.startswith('http'):
-                        logger.debug(f"Returning PDF URL from link: {href}")
-                        return href
-                    else:
-                        pdf_url = self._normalize_url(href)
-                        logger.debug(f"Returning PDF URL from link: {pdf_url}")
-                        return pdf_url
+            if link:
+                pdf_url = self._normalize_url(link, mirror)
+                logger.debug(f"Returning PDF URL: {pdf_url}")
+                return pdf_url
             
             logger.warning(f"No PDF URL found in Sci-Hub page for: {doi}")
             return None
@@ -326,18 +438,156 @@ class SciHubFetcher:
             logger.error(f"Error getting PDF URL: {e}")
             return None
 
-    def _normalize_url(self, url: str) -> str:
-        """规范化 URL"""
+    def _find_pdf_link_lexbor(self, html: bytes) -> Optional[str]:
+        """使用 selectolax (Lexbor, C 实现) 查找 PDF 链接，优先级与 BeautifulSoup 版本一致"""
+        tree = LexborHTMLParser(html)
+        
+        # 方法 1: embed 标签（现代 Sci-Hub 最常用）
+        # 方法 2: iframe（回退方案）
+        for selector in ('embed[type="application/pdf"][src]', 'iframe[src]'):
+            node = tree.css_first(selector)
+            if node and node.attributes.get('src'):
+                return node.attributes['src']
+        
+        # 方法 3: 下载按钮的 onclick
+        for button in tree.css('button[onclick]'):
+            onclick = button.attributes.get('onclick') or ''
+            if 'pdf' in onclick.lower():
+                match = _ONCLICK_RE.search(onclick)
+                if match:
+                    return match.group(1)
+        
+        # 方法 4: 直接下载链接
+        for link in tree.css('a[href]'):
+            href = link.attributes.get('href') or ''
+            if 'pdf' in href.lower():
+                return href
+        
+        return None
+
+    def _find_pdf_link_bs4(self, html: bytes) -> Optional[str]:
+        """使用 BeautifulSoup 查找 PDF 链接（selectolax 不可用时的回退方案）"""
+        # 延迟导入：正则和 selectolax 都未命中时才需要
+        from bs4 import BeautifulSoup
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # 方法 1: embed 标签（现代 Sci-Hub 最常用）
+        embed = soup.find('embed', {'type': 'application/pdf'})
+        if embed:
+            src = embed.get('src') if hasattr(embed, 'get') else None
+            if src and isinstance(src, str):
+                return src
+        
+        # 方法 2: iframe（回退方案）
+        iframe = soup.find('iframe')
+        if iframe:
+            src = iframe.get('src') if hasattr(iframe, 'get') else None
+            if src and isinstance(src, str):
+                return src
+        
+        # 方法 3: 下载按钮的 onclick
+        for button in soup.find_all('button'):
+            onclick = button.get('onclick', '') if hasattr(button, 'get') else ''
+            if isinstance(onclick, str) and 'pdf' in onclick.lower():
+                match = _ONCLICK_RE.search(onclick)
+                if match:
+                    return match.group(1)
+        
+        # 方法 4: 直接下载链接
+        for link in soup.find_all('a'):
+            href = link.get('href', '') if hasattr(link, 'get') else ''
+            if isinstance(href, str) and href and 'pdf' in href.lower():
+                return href
+        
+        return None
+
+    def _fetch_page(self, doi: str) -> Optional[Tuple[str, bytes]]:
+        """同时向所有镜像请求 DOI 页面（hedged requests），返回最先找到文章的 (镜像, 页面)
+        
+        单个镜像变慢、宕机或出错时不必等到超时再回退；胜出的镜像成为新的首选镜像。
+        所有镜像都返回 "article not found" 时返回其中一个页面，由调用方判断。
+        
+        胜出后不等待其他镜像：已收到响应头的请求直接关闭连接、不再读取正文；
+        仍在连接或等待响应头的请求无法中断，会在后台守护线程中运行到响应或超时为止
+        （守护线程不会阻塞解释器退出）。
+        """
+        mirrors = list(self._mirrors)
+        finished = threading.Event()
+        results: "queue.Queue[Tuple[str, Optional[bytes]]]" = queue.Queue()
+        
+        def fetch(mirror: str) -> None:
+            # 单个镜像出错不能中断其他镜像
+            try:
+                page = self._fetch_from_mirror(mirror, doi, finished)
+            except Exception as e:
+                logger.warning(f"Sci-Hub mirror {mirror} failed: {e}")
+                page = None
+            results.put((mirror, page))
+        
+        for mirror in mirrors:
+            threading.Thread(target=fetch, args=(mirror,), daemon=True).start()
+        
+        not_found = None
+        try:
+            for _ in mirrors:
+                mirror, page = results.get()
+                if page is None:
+                    continue
+                if b"article not found" in page.lower():
+                    not_found = not_found or (mirror, page)
+                    continue
+                
+                with self._mirror_lock:
+                    if mirror != self.base_url:
+                        logger.info(f"Switching Sci-Hub mirror: {self.base_url} -> {mirror}")
+                        self._mirrors.remove(mirror)
+                        self._mirrors.insert(0, mirror)
+                        self.base_url = mirror
+                return mirror, page
+            
+            return not_found
+        finally:
+            # 通知较慢的镜像放弃读取正文，不等待它们结束
+            finished.set()
+
+    def _fetch_from_mirror(
+        self,
+        mirror: str,
+        doi: str,
+        finished: Optional[threading.Event] = None
+    ) -> Optional[bytes]:
+        """从单个镜像获取 DOI 页面（最多 _MAX_PAGE_BYTES 字节），失败返回 None
+        
+        finished 已被设置（其他镜像已胜出）时，收到响应头后直接关闭连接。
+        """
+        try:
+            with self.session.get(
+                f"{mirror}/{doi}", verify=False, timeout=self.timeout, stream=True
+            ) as response:
+                if finished is not None and finished.is_set():
+                    return None
+                if response.status_code != 200:
+                    logger.warning(f"Sci-Hub mirror {mirror} returned status {response.status_code}")
+                    return None
+                return response.raw.read(_MAX_PAGE_BYTES, decode_content=True)
+        # raw.read 直接读取 urllib3 流，读取超时/连接中断抛出的是 urllib3 异常
+        except (requests.exceptions.RequestException, Urllib3HTTPError) as e:
+            logger.warning(f"Sci-Hub mirror {mirror} failed: {e}")
+            return None
+
+    def _normalize_url(self, url: str, base_url: Optional[str] = None) -> str:
+        """规范化 URL（相对路径基于返回页面的镜像解析，默认为当前首选镜像）"""
         if url.startswith('//'):
             return 'https:' + url
         elif url.startswith('/'):
-            return self.base_url + url
+            return (base_url or self.base_url) + url
         return url
 
     def _generate_filename(self, doi: str, response: requests.Response) -> str:
         """生成文件名"""
         # 清理 DOI 作为文件名
-        clean_doi = re.sub(r'[^\w\-_.]', '_', doi)
+        clean_doi = doi.translate(_FILENAME_TABLE)
         # 添加短哈希以避免冲突
         content_hash = hashlib.md5(response.content).hexdigest()[:6]
         return f"scihub_{clean_doi}_{content_hash}.pdf"
@@ -7,22 +7,31 @@ SemanticSearcher - Semantic Scholar 论文搜索
 - 只请求必要字段（减少延迟和配额消耗）
 - 指数退避重试机制
 - 使用 PyMuPDF4LLM 提取 PDF（替代 PyPDF2）
-- Session 复用
+- HTTP/2 连接复用（httpx）
 """
-from typing import List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Literal, Optional, Tuple
 from datetime import datetime
+import httpx
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
 import os
 import re
 import logging
 
 from ..paper import Paper
-
-import pymupdf4llm
+from .pdf_utils import EXTRACTION_ERROR_PREFIX, default_num_workers, extract_many, extract_pdf
 
 logger = logging.getLogger(__name__)
 
+# 预编译正则：disclaimer 中的 URL
+_URL_RE = re.compile(r'https?://[^\s,)"]+')
+
 
 class PaperSource:
     """Abstract base class for paper sources"""
@@ -62,11 +71,17 @@ class SemanticSearcher(PaperSource):
         "externalIds", "fieldsOfStudy", "openAccessPdf"
     ]
     
+    # 论文详情缓存上限
+    DETAILS_CACHE_SIZE = 1024
+    # /paper/batch 单次请求的 ID 上限
+    BATCH_SIZE = 500
+    
     def __init__(
         self,
         api_key: Optional[str] = None,
         timeout: int = 30,
-        max_retries: int = 3
+        max_retries: int = 3,
+        max_age_seconds: float = 3600
     ):
         """初始化 Semantic Scholar 搜索器
         
@@ -74,21 +89,25 @@ class SemanticSearcher(PaperSource):
             api_key: API Key（默认从环境变量获取）
             timeout: 请求超时时间（秒）
             max_retries: 最大重试次数
+            max_age_seconds: 论文详情缓存有效期（秒），0 表示不缓存
         """
         self.api_key = api_key or os.environ.get('SEMANTIC_SCHOLAR_API_KEY', '')
         self.timeout = timeout
         self.max_retries = max_retries
+        self.max_age_seconds = max_age_seconds
         
-        # Session 复用
-        self.session = requests.Session()
-        self.session.headers.update({
+        # 论文详情 LRU 缓存：paper_id -> (获取时间, Paper)
+        self._details_cache: "OrderedDict[str, Tuple[float, Paper]]" = OrderedDict()
+        
+        # API 客户端：HTTP/2 多路复用，并发请求共享同一个 TLS 连接
+        headers = {
             'User-Agent': 'paper_search_mcp/1.0',
             'Accept': 'application/json',
-        })
+        }
         
         # 添加 API Key 到 headers
         if self.api_key:
-            self.session.headers['x-api-key'] = self.api_key
+            headers['x-api-key'] = self.api_key
             logger.info("Using authenticated access with API key")
         else:
             logger.warning(
@@ -96,29 +115,58 @@ class SemanticSearcher(PaperSource):
                 "Using shared rate limit (5000 req/5min shared with all users)"
             )
         
+        self.session = httpx.Client(
+            http2=True,
+            headers=headers,
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        
+        # PDF 下载专用 Session：不携带 API Key，连接池按出版商主机复用连接
+        self._pdf_session = requests.Session()
+        self._pdf_session.headers['User-Agent'] = self.session.headers['User-Agent']
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self._pdf_session.mount('https://', adapter)
+        self._pdf_session.mount('http://', adapter)
+        
         # 速率限制追踪
         self._last_request_time = 0.0
+        self._rate_limit_lock = threading.Lock()
         # 有 API Key = 1 RPS，无 API Key = 共享池
         self.min_request_interval = 1.0 if self.api_key else 0.5
 
     def _rate_limit_wait(self):
-        """速率限制等待"""
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self._last_request_time = time.time()
+        """速率限制等待（线程安全，供 read_papers 并发下载使用）"""
+        with self._rate_limit_lock:
+            elapsed = time.time() - self._last_request_time
+            if elapsed < self.min_request_interval:
+                time.sleep(self.min_request_interval - elapsed)
+            self._last_request_time = time.time()
 
     def _make_request(
         self, 
         endpoint: str, 
         params: dict,
+        method: str = "GET",
+        json: Optional[dict] = None,
         retry_count: int = 0
-    ) -> Optional[requests.Response]:
+    ) -> Optional[httpx.Response]:
         """发送 API 请求，带重试机制
         
         Args:
             endpoint: API 端点路径
             params: 请求参数
+            method: HTTP 方法（"GET" 或 "POST"）
+            json: POST 请求体
             retry_count: 当前重试次数
             
         Returns:
@@ -129,7 +177,7 @@ class SemanticSearcher(PaperSource):
         url = f"{self.BASE_URL}/{endpoint}"
         
         try:
-            response = self.session.get(url, params=params, timeout=self.timeout)
+            response = self.session.request(method, url, params=params, json=json)
             
             # 处理 429 速率限制
             if response.status_code == 429:
@@ -138,7 +186,9 @@ class SemanticSearcher(PaperSource):
                     wait_time = (2 ** retry_count) + (time.time() % 1)
                     logger.warning(f"Rate limited (429), retrying in {wait_time:.1f}s...")
                     time.sleep(wait_time)
-                    return self._make_request(endpoint, params, retry_count + 1)
+                    return self._make_request(
+                        endpoint, params, method=method, json=json, retry_count=retry_count + 1
+                    )
                 else:
                     logger.error(f"Rate limited after {self.max_retries} retries")
                     return None
@@ -146,25 +196,38 @@ class SemanticSearcher(PaperSource):
             response.raise_for_status()
             return response
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             if retry_count < self.max_retries:
                 wait_time = 2 ** retry_count
                 logger.warning(f"Request failed, retrying in {wait_time}s: {e}")
                 time.sleep(wait_time)
-                return self._make_request(endpoint, params, retry_count + 1)
+                return self._make_request(
+                    endpoint, params, method=method, json=json, retry_count=retry_count + 1
+                )
             logger.error(f"Request failed after {self.max_retries} retries: {e}")
             return None
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
-        """解析日期字符串"""
+        """解析日期字符串（"YYYY-MM-DD" 或 "YYYY"）
+        
+        常见的标准格式直接切片转换，比 strptime 快一个数量级；
+        其他格式回退到 strptime，结果与之完全一致。
+        """
         if not date_str:
             return None
+        s = date_str.strip()
+        if (len(s) == 10 and s.isascii() and s[4] == '-' and s[7] == '-'
+                and s[0:4].isdigit() and s[5:7].isdigit() and s[8:10].isdigit()):
+            try:
+                return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+            except ValueError:
+                pass
         try:
-            return datetime.strptime(date_str.strip(), "%Y-%m-%d")
+            return datetime.strptime(s, "%Y-%m-%d")
         except ValueError:
             # 尝试只解析年份
             try:
-                return datetime.strptime(date_str.strip()[:4], "%Y")
+                return datetime.strptime(s[:4], "%Y")
             except ValueError:
                 return None
 
@@ -181,8 +244,7 @@ class SemanticSearcher(PaperSource):
         disclaimer = open_access_pdf.get('disclaimer', '')
         if disclaimer:
             # 匹配 URL 模式
-            url_pattern = r'https?://[^\s,)"]+'
-            matches = re.findall(url_pattern, disclaimer)
+            matches = _URL_RE.findall(disclaimer)
             
             if matches:
                 # 优先返回 DOI 或 arXiv URL
@@ -272,7 +334,7 @@ class SemanticSearcher(PaperSource):
             return []
         
         try:
-            data = response.json()
+            data = orjson.loads(response.content)
             results = data.get('data', [])
         except Exception as e:
             logger.error(f"Failed to parse response: {e}")
@@ -302,6 +364,10 @@ class SemanticSearcher(PaperSource):
         Returns:
             Paper 对象或 None
         """
+        cached = self._get_cached_details(paper_id)
+        if cached:
+            return cached
+        
         params = {"fields": ",".join(self.DEFAULT_FIELDS)}
         
         response = self._make_request(f"paper/{paper_id}", params)
@@ -309,23 +375,114 @@ class SemanticSearcher(PaperSource):
             return None
         
         try:
-            data = response.json()
-            return self._parse_paper(data)
+            data = orjson.loads(response.content)
+            paper = self._parse_paper(data)
         except Exception as e:
             logger.error(f"Failed to get paper details: {e}")
             return None
+        
+        self._cache_details(paper_id, paper)
+        return paper
 
-    def download_pdf(self, paper_id: str, save_path: str) -> str:
+    def get_papers_batch(self, paper_ids: List[str]) -> List[Optional[Paper]]:
+        """批量获取论文详情（POST /paper/batch，每次最多 500 个 ID）
+        
+        已缓存的论文不再请求；N 篇论文只需 ceil(N/500) 次受速率限制的请求。
+        
+        Args:
+            paper_ids: 论文 ID 列表（格式同 get_paper_details）
+            
+        Returns:
+            与 paper_ids 一一对应的 Paper 对象或 None（未找到）
+        """
+        missing = self._uncached_ids(paper_ids)
+        found = {}
+        
+        params = {"fields": ",".join(self.DEFAULT_FIELDS)}
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            chunk = missing[start:start + self.BATCH_SIZE]
+            response = self._make_request(
+                "paper/batch", params, method="POST", json={"ids": chunk}
+            )
+            if response:
+                found.update(self._parse_batch_response(chunk, response))
+        
+        return [found.get(paper_id) or self._get_cached_details(paper_id) for paper_id in paper_ids]
+
+    def _uncached_ids(self, paper_ids: List[str]) -> List[str]:
+        """返回未缓存（或已过期）的论文 ID，去重并保持顺序"""
+        return list(dict.fromkeys(
+            paper_id for paper_id in paper_ids if not self._get_cached_details(paper_id)
+        ))
+
+    def _parse_batch_response(self, paper_ids: List[str], response) -> Dict[str, Paper]:
+        """解析 /paper/batch 响应并写入缓存（结果与请求 ID 顺序一致，未找到的为 null）"""
+        try:
+            results = orjson.loads(response.content)
+        except Exception as e:
+            logger.error(f"Failed to parse batch response: {e}")
+            return {}
+        
+        found = {}
+        for paper_id, data in zip(paper_ids, results):
+            paper = self._parse_paper(data) if data else None
+            if paper:
+                found[paper_id] = paper
+                self._cache_details(paper_id, paper)
+        return found
+
+    def _get_cached_details(self, paper_id: str) -> Optional[Paper]:
+        """从缓存获取论文详情（过期返回 None）"""
+        entry = self._details_cache.get(paper_id)
+        if not entry:
+            return None
+        
+        fetched_at, paper = entry
+        if time.time() - fetched_at > self.max_age_seconds:
+            self._details_cache.pop(paper_id, None)
+            return None
+        
+        self._details_cache.move_to_end(paper_id)
+        return paper
+
+    def _cache_details(self, paper_id: str, paper: Optional[Paper]) -> None:
+        """缓存论文详情，同时以 Semantic Scholar ID 为键，超出上限时淘汰最久未用的条目"""
+        if not paper or self.max_age_seconds <= 0:
+            return
+        
+        now = time.time()
+        for key in {paper_id, paper.paper_id}:
+            self._details_cache[key] = (now, paper)
+            self._details_cache.move_to_end(key)
+        
+        while len(self._details_cache) > self.DETAILS_CACHE_SIZE:
+            self._details_cache.popitem(last=False)
+
+    def _pdf_path(self, paper_id: str, save_path: str) -> str:
+        """生成 PDF 保存路径（并确保目录存在）"""
+        os.makedirs(save_path, exist_ok=True)
+        safe_id = paper_id.replace('/', '_').replace(':', '_')
+        return os.path.join(save_path, f"semantic_{safe_id}.pdf")
+
+    def download_pdf(
+        self,
+        paper_id: str,
+        save_path: str,
+        *,
+        paper: Optional[Paper] = None
+    ) -> str:
         """下载论文 PDF
         
         Args:
             paper_id: 论文 ID（支持多种格式）
             save_path: 保存目录
+            paper: 已获取的论文详情（可选，省去一次查询以获得 PDF URL）
             
         Returns:
             下载的文件路径或错误信息
         """
-        paper = self.get_paper_details(paper_id)
+        if paper is None:
+            paper = self.get_paper_details(paper_id)
         if not paper:
             return f"Error: Could not find paper {paper_id}"
         
@@ -336,30 +493,39 @@ class SemanticSearcher(PaperSource):
         logger.info(f"Downloading PDF from: {pdf_url}")
         
         try:
-            # 直接使用 requests 下载
-            pdf_response = requests.get(pdf_url, timeout=60)
-            pdf_response.raise_for_status()
-            
-            # 验证下载的内容是 PDF
-            content_type = pdf_response.headers.get('Content-Type', '')
-            content = pdf_response.content
-            
-            # 检查是否是 PDF（通过内容头部）
-            if not content.startswith(b'%PDF') and 'application/pdf' not in content_type:
-                logger.warning(f"Downloaded content is not a PDF. Content-Type: {content_type}")
-                # 如果是 HTML 页面（如 OSTI），尝试提取真实 PDF 链接
-                if b'<html' in content[:1000].lower() or b'<!doctype' in content[:1000].lower():
-                    logger.error("Downloaded HTML instead of PDF. The URL may require browser access.")
-                    return f"Error: URL {pdf_url} returned HTML, not PDF. This may require direct browser download."
-            
-            # 准备保存路径
-            os.makedirs(save_path, exist_ok=True)
-            safe_id = paper_id.replace('/', '_').replace(':', '_')
-            filename = f"semantic_{safe_id}.pdf"
-            pdf_path = os.path.join(save_path, filename)
-            
-            with open(pdf_path, "wb") as f:
-                f.write(content)
+            # 流式下载，复用连接池
+            with self._pdf_session.get(pdf_url, timeout=60, stream=True) as pdf_response:
+                pdf_response.raise_for_status()
+                
+                # 验证下载的内容是 PDF（只看第一个块）
+                # 1 MiB 块：大 PDF 只需少量 Python 层循环和 write 调用
+                content_type = pdf_response.headers.get('Content-Type', '')
+                chunks = pdf_response.iter_content(chunk_size=1 << 20)
+                first = next((chunk for chunk in chunks if chunk), b'')
+                
+                # 检查是否是 PDF（通过内容头部）
+                if not first.startswith(b'%PDF') and 'application/pdf' not in content_type:
+                    logger.warning(f"Downloaded content is not a PDF. Content-Type: {content_type}")
+                    # 如果是 HTML 页面（如 OSTI），尝试提取真实 PDF 链接
+                    if b'<html' in first[:1000].lower() or b'<!doctype' in first[:1000].lower():
+                        logger.error("Downloaded HTML instead of PDF. The URL may require browser access.")
+                        return f"Error: URL {pdf_url} returned HTML, not PDF. This may require direct browser download."
+                
+                # 准备保存路径
+                pdf_path = self._pdf_path(paper_id, save_path)
+                
+                # 先写入 .part 临时文件，完整下载后再改名，中途出错不留下残缺的 PDF
+                part_path = f"{pdf_path}.part"
+                try:
+                    with open(part_path, "wb") as f:
+                        f.write(first)
+                        for chunk in chunks:
+                            f.write(chunk)
+                except BaseException:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+                os.replace(part_path, pdf_path)
             
             # 最终验证
             file_size = os.path.getsize(pdf_path)
@@ -376,48 +542,124 @@ class SemanticSearcher(PaperSource):
             logger.error(f"PDF download error: {e}")
             return f"Error downloading PDF: {e}"
 
-    def read_paper(self, paper_id: str, save_path: str) -> str:
+    def read_paper(
+        self,
+        paper_id: str,
+        save_path: str,
+        output_format: Literal["markdown", "text"] = "markdown",
+        *,
+        paper: Optional[Paper] = None
+    ) -> str:
         """下载并提取论文文本
         
-        使用 PyMuPDF4LLM 提取 Markdown 格式。
+        默认使用 PyMuPDF4LLM 提取 Markdown 格式。
         
         Args:
             paper_id: 论文 ID
             save_path: 保存目录
+            output_format: 输出格式（与 ArxivSearcher.read_paper 一致）
+                - "markdown": Markdown 格式（推荐，包含表格）
+                - "text": 纯文本格式（快得多，但丢失表格和标题结构）
+            paper: 已获取的论文详情（仅限关键字参数，可选，省去一次查询）
             
         Returns:
             提取的文本内容或错误信息
         """
+        # 只查询一次论文详情，下载和元数据共用
+        if paper is None:
+            paper = self.get_paper_details(paper_id)
+        if not paper:
+            return f"Error: Could not find paper {paper_id}"
+        
         # 先下载 PDF
-        pdf_path = self.download_pdf(paper_id, save_path)
+        pdf_path = self.download_pdf(paper_id, save_path, paper=paper)
         if pdf_path.startswith("Error"):
             return pdf_path
         
-        # 获取论文元数据
-        paper = self.get_paper_details(paper_id)
+        text = extract_pdf(pdf_path, output_format)
+        return self._format_paper_text(paper_id, pdf_path, text, paper)
+
+    def read_papers(
+        self,
+        paper_ids: List[str],
+        save_path: str,
+        num_workers: Optional[int] = None,
+        output_format: Literal["markdown", "text"] = "markdown"
+    ) -> List[str]:
+        """批量下载并提取论文文本
         
-        try:
-            text = pymupdf4llm.to_markdown(pdf_path, show_progress=False)
-            logger.info(f"Extracted {len(text)} characters using PyMuPDF4LLM")
-            
-            if not text.strip():
-                return f"PDF downloaded to {pdf_path}, but no text could be extracted."
-            
-            # 添加元数据
-            metadata = ""
-            if paper:
-                metadata = f"# {paper.title}\n\n"
-                metadata += f"**Authors**: {', '.join(paper.authors)}\n"
-                metadata += f"**Published**: {paper.published_date}\n"
-                metadata += f"**URL**: {paper.url}\n"
-                metadata += f"**PDF**: {pdf_path}\n\n"
-                metadata += "---\n\n"
-            
-            return metadata + text
+        PDF 用线程池并发下载，再交给进程池并行提取文本。
+        
+        Args:
+            paper_ids: 论文 ID 列表
+            save_path: 保存目录
+            num_workers: 下载线程数和提取进程数（默认 CPU 核数，最多 4）
+            output_format: 输出格式（同 read_paper）
             
-        except Exception as e:
-            logger.error(f"Failed to extract text: {e}")
-            return f"Error extracting text: {e}"
+        Returns:
+            与 paper_ids 一一对应的文本内容或错误信息
+        """
+        if not paper_ids:
+            return []
+        
+        # 重复 ID 只下载一次（否则多个线程会同时写入同一个文件）
+        unique_ids = list(dict.fromkeys(paper_ids))
+        
+        # 一次批量请求获取所有论文详情，下载和元数据共用
+        papers = self.get_papers_batch(unique_ids)
+        
+        def download(paper_id: str, paper: Optional[Paper]) -> str:
+            if not paper:
+                return f"Error: Could not find paper {paper_id}"
+            return self.download_pdf(paper_id, save_path, paper=paper)
+        
+        num_workers = num_workers or default_num_workers()
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            pdf_paths = list(executor.map(download, unique_ids, papers))
+        
+        texts = extract_many(
+            [path for path in pdf_paths if not path.startswith("Error")],
+            num_workers,
+            output_format
+        )
+        
+        results = {
+            paper_id: pdf_path if pdf_path.startswith("Error")
+            else self._format_paper_text(paper_id, pdf_path, texts[pdf_path], paper)
+            for paper_id, paper, pdf_path in zip(unique_ids, papers, pdf_paths)
+        }
+        return [results[paper_id] for paper_id in paper_ids]
+
+    def _format_paper_text(
+        self,
+        paper_id: str,
+        pdf_path: str,
+        text: str,
+        paper: Optional[Paper] = None
+    ) -> str:
+        """为提取的文本添加论文元数据"""
+        if text.startswith(EXTRACTION_ERROR_PREFIX):
+            logger.error(f"Failed to extract text from {pdf_path}: {text}")
+            return text
+        
+        logger.info(f"Extracted {len(text)} characters from {pdf_path}")
+        if not text.strip():
+            return f"PDF downloaded to {pdf_path}, but no text could be extracted."
+        
+        # 获取论文元数据（未传入时查询，通常命中缓存）
+        if paper is None:
+            paper = self.get_paper_details(paper_id)
+        
+        metadata = ""
+        if paper:
+            metadata = f"# {paper.title}\n\n"
+            metadata += f"**Authors**: {', '.join(paper.authors)}\n"
+            metadata += f"**Published**: {paper.published_date}\n"
+            metadata += f"**URL**: {paper.url}\n"
+            metadata += f"**PDF**: {pdf_path}\n\n"
+            metadata += "---\n\n"
+        
+        return metadata + text
 
 
 # ============================================================
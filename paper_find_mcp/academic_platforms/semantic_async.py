@@ -0,0 +1,363 @@
+# paper_search_mcp/academic_platforms/semantic_async.py
+"""
+AsyncSemanticSearcher - Semantic Scholar 异步批量接口
+
+在 SemanticSearcher 基础上增加并发批量操作：
+- search_many: 并发执行多个查询
+- get_details_many: 并发获取多篇论文详情
+- download_many: 并发下载多篇 PDF（流式写入）
+
+网络请求大部分时间阻塞在 I/O 上，并发后批量任务的总耗时
+约等于最慢的单个请求（API 请求仍受 min_request_interval 限制）。
+同步 API（search / get_paper_details / download_pdf）继承自 SemanticSearcher，保持不变。
+"""
+from typing import Any, Awaitable, Iterable, List, Optional
+import asyncio
+import time
+import os
+import logging
+
+import httpx
+import orjson
+
+from ..paper import Paper
+from .semantic import SemanticSearcher
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSemanticSearcher(SemanticSearcher):
+    """Semantic Scholar 异步批量搜索器
+
+    使用 httpx.AsyncClient 复用连接，并通过 asyncio.Semaphore 限制并发数。
+
+    Example:
+        >>> async with AsyncSemanticSearcher() as searcher:
+        ...     papers = await searcher.get_details_many(["DOI:10.1038/nature12373"])
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: int = 30,
+        max_retries: int = 3,
+        concurrency: int = 5,
+        max_age_seconds: float = 3600
+    ):
+        """初始化异步搜索器
+
+        Args:
+            api_key: API Key（默认从环境变量获取）
+            timeout: 请求超时时间（秒）
+            max_retries: 最大重试次数
+            concurrency: 批量操作的默认最大并发数
+            max_age_seconds: 论文详情缓存有效期（秒），0 表示不缓存
+        """
+        super().__init__(
+            api_key=api_key,
+            timeout=timeout,
+            max_retries=max_retries,
+            max_age_seconds=max_age_seconds
+        )
+        self.concurrency = concurrency
+
+        # 延迟创建（必须在事件循环内创建）
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._rate_lock: Optional[asyncio.Lock] = None
+
+    async def __aenter__(self) -> "AsyncSemanticSearcher":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取（或创建）绑定当前事件循环的 AsyncClient"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            # API 专用 headers（含 x-api-key）只在 _amake_request 中附加，避免泄露给 PDF 主机
+            self._client = httpx.AsyncClient(
+                headers={'User-Agent': self.session.headers['User-Agent']},
+                timeout=self.timeout,
+                http2=True,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=20, keepalive_expiry=85),
+            )
+            self._client_loop = loop
+            self._rate_lock = asyncio.Lock()
+        return self._client
+
+    def _api_headers(self) -> dict:
+        """Semantic Scholar API 请求头"""
+        return {
+            key: value for key, value in self.session.headers.items()
+            if key.lower() in ('accept', 'x-api-key')
+        }
+
+    async def aclose(self) -> None:
+        """关闭底层连接池"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def _arate_limit_wait(self):
+        """速率限制等待（并发请求之间串行排队）"""
+        async with self._rate_lock:
+            elapsed = time.time() - self._last_request_time
+            if elapsed < self.min_request_interval:
+                await asyncio.sleep(self.min_request_interval - elapsed)
+            self._last_request_time = time.time()
+
+    async def _amake_request(
+        self,
+        endpoint: str,
+        params: dict,
+        method: str = "GET",
+        json: Optional[dict] = None,
+        retry_count: int = 0
+    ) -> Optional[httpx.Response]:
+        """发送异步 API 请求，参数和重试策略与 _make_request 一致"""
+        client = self._get_client()
+        await self._arate_limit_wait()
+
+        url = f"{self.BASE_URL}/{endpoint}"
+
+        try:
+            response = await client.request(
+                method, url, params=params, json=json, headers=self._api_headers()
+            )
+
+            # 处理 429 速率限制
+            if response.status_code == 429:
+                if retry_count < self.max_retries:
+                    wait_time = (2 ** retry_count) + (time.time() % 1)
+                    logger.warning(f"Rate limited (429), retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+                    return await self._amake_request(
+                        endpoint, params, method=method, json=json, retry_count=retry_count + 1
+                    )
+                logger.error(f"Rate limited after {self.max_retries} retries")
+                return None
+
+            response.raise_for_status()
+            return response
+
+        except httpx.HTTPError as e:
+            if retry_count < self.max_retries:
+                wait_time = 2 ** retry_count
+                logger.warning(f"Request failed, retrying in {wait_time}s: {e}")
+                await asyncio.sleep(wait_time)
+                return await self._amake_request(
+                    endpoint, params, method=method, json=json, retry_count=retry_count + 1
+                )
+            logger.error(f"Request failed after {self.max_retries} retries: {e}")
+            return None
+
+    async def _gather(
+        self,
+        coros: Iterable[Awaitable[Any]],
+        concurrency: Optional[int] = None
+    ) -> List[Any]:
+        """并发执行协程，最多 concurrency 个同时运行，结果保持输入顺序"""
+        semaphore = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def run(coro: Awaitable[Any]) -> Any:
+            async with semaphore:
+                return await coro
+
+        return await asyncio.gather(*(run(coro) for coro in coros))
+
+    # ============================================================
+    # 单个请求（异步版本）
+    # ============================================================
+    async def asearch(
+        self,
+        query: str,
+        year: Optional[str] = None,
+        max_results: int = 10
+    ) -> List[Paper]:
+        """异步搜索论文，参数同 search"""
+        params = {
+            "query": query,
+            "limit": min(max_results, 100),
+            "fields": ",".join(self.DEFAULT_FIELDS),
+        }
+        if year:
+            params["year"] = year
+
+        response = await self._amake_request("paper/search", params)
+        if not response:
+            return []
+
+        try:
+            results = orjson.loads(response.content).get('data', [])
+        except Exception as e:
+            logger.error(f"Failed to parse response: {e}")
+            return []
+
+        papers = [self._parse_paper(item) for item in results[:max_results]]
+        return [paper for paper in papers if paper]
+
+    async def aget_paper_details(self, paper_id: str) -> Optional[Paper]:
+        """异步获取单篇论文详情，参数同 get_paper_details（与同步版本共用缓存）"""
+        cached = self._get_cached_details(paper_id)
+        if cached:
+            return cached
+
+        params = {"fields": ",".join(self.DEFAULT_FIELDS)}
+
+        response = await self._amake_request(f"paper/{paper_id}", params)
+        if not response:
+            return None
+
+        try:
+            paper = self._parse_paper(orjson.loads(response.content))
+        except Exception as e:
+            logger.error(f"Failed to get paper details: {e}")
+            return None
+
+        self._cache_details(paper_id, paper)
+        return paper
+
+    async def aget_papers_batch(self, paper_ids: List[str]) -> List[Optional[Paper]]:
+        """异步批量获取论文详情，参数同 get_papers_batch"""
+        missing = self._uncached_ids(paper_ids)
+        found = {}
+
+        params = {"fields": ",".join(self.DEFAULT_FIELDS)}
+        for start in range(0, len(missing), self.BATCH_SIZE):
+            chunk = missing[start:start + self.BATCH_SIZE]
+            response = await self._amake_request(
+                "paper/batch", params, method="POST", json={"ids": chunk}
+            )
+            if response:
+                found.update(self._parse_batch_response(chunk, response))
+
+        return [found.get(paper_id) or self._get_cached_details(paper_id) for paper_id in paper_ids]
+
+    async def adownload_pdf(
+        self,
+        paper_id: str,
+        save_path: str,
+        *,
+        paper: Optional[Paper] = None
+    ) -> str:
+        """异步下载论文 PDF（流式写入磁盘），参数同 download_pdf
+
+        Returns:
+            下载的文件路径或错误信息
+        """
+        if paper is None:
+            paper = await self.aget_paper_details(paper_id)
+        if not paper:
+            return f"Error: Could not find paper {paper_id}"
+
+        if not paper.pdf_url:
+            return f"Error: No PDF URL available for paper {paper_id}"
+
+        pdf_url = paper.pdf_url
+        pdf_path = self._pdf_path(paper_id, save_path)
+        client = self._get_client()
+
+        try:
+            async with client.stream("GET", pdf_url, timeout=60) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+
+                chunks = response.aiter_bytes(1 << 20)
+                first = b''
+                async for first in chunks:
+                    if first:
+                        break
+
+                # 检查是否是 PDF（通过内容头部）
+                if not first.startswith(b'%PDF') and 'application/pdf' not in content_type:
+                    head = first[:1000].lower()
+                    if b'<html' in head or b'<!doctype' in head:
+                        logger.error("Downloaded HTML instead of PDF. The URL may require browser access.")
+                        return f"Error: URL {pdf_url} returned HTML, not PDF. This may require direct browser download."
+
+                # 先写入 .part 临时文件，完整下载后再改名，中途出错不留下残缺的 PDF
+                part_path = f"{pdf_path}.part"
+                try:
+                    with open(part_path, "wb") as f:
+                        f.write(first)
+                        async for chunk in chunks:
+                            f.write(chunk)
+                except BaseException:
+                    if os.path.exists(part_path):
+                        os.remove(part_path)
+                    raise
+                os.replace(part_path, pdf_path)
+
+        except httpx.TimeoutException:
+            return f"Error: Download timed out for {pdf_url}"
+        except httpx.HTTPError as e:
+            logger.error(f"PDF download error: {e}")
+            return f"Error downloading PDF: {e}"
+
+        file_size = os.path.getsize(pdf_path)
+        if file_size < 1000:
+            os.remove(pdf_path)
+            return f"Error: Downloaded file too small ({file_size} bytes)"
+
+        logger.info(f"PDF downloaded successfully: {pdf_path} ({file_size} bytes)")
+        return pdf_path
+
+    # ============================================================
+    # 批量操作
+    # ============================================================
+    async def search_many(
+        self,
+        queries: List[str],
+        year: Optional[str] = None,
+        max_results: int = 10,
+        concurrency: Optional[int] = None
+    ) -> List[List[Paper]]:
+        """并发执行多个查询，结果顺序与 queries 一致"""
+        return await self._gather(
+            (self.asearch(query, year=year, max_results=max_results) for query in queries),
+            concurrency
+        )
+
+    async def get_details_many(
+        self,
+        paper_ids: List[str],
+        concurrency: Optional[int] = None
+    ) -> List[Optional[Paper]]:
+        """并发获取多篇论文详情，结果顺序与 paper_ids 一致"""
+        return await self._gather(
+            (self.aget_paper_details(paper_id) for paper_id in paper_ids),
+            concurrency
+        )
+
+    async def download_many(
+        self,
+        paper_ids: List[str],
+        save_path: str,
+        concurrency: Optional[int] = None
+    ) -> List[str]:
+        """并发下载多篇论文 PDF
+
+        Returns:
+            与 paper_ids 一一对应的文件路径或错误信息
+        """
+        # 重复 ID 只下载一次（否则多个协程会同时写入同一个文件）
+        unique_ids = list(dict.fromkeys(paper_ids))
+
+        # 一次批量请求获取所有论文详情，避免逐篇查询
+        papers = await self.aget_papers_batch(unique_ids)
+
+        async def download(paper_id: str, paper: Optional[Paper]) -> str:
+            if not paper:
+                return f"Error: Could not find paper {paper_id}"
+            return await self.adownload_pdf(paper_id, save_path, paper=paper)
+
+        pdf_paths = await self._gather(
+            (download(paper_id, paper) for paper_id, paper in zip(unique_ids, papers)),
+            concurrency
+        )
+        results = dict(zip(unique_ids, pdf_paths))
+        return [results[paper_id] for paper_id in paper_ids]
@@ -0,0 +1,120 @@
+# tests/test_pdf_utils.py
+import unittest
+import tempfile
+import shutil
+import os
+from unittest import mock
+import pymupdf
+from paper_find_mcp.academic_platforms import pdf_utils
+from paper_find_mcp.academic_platforms.pdf_utils import (
+    extract_many,
+    extract_pdf,
+    pdf_to_markdown,
+    pdf_to_text,
+)
+
+
+def make_pdf(path, text):
+    """Create a one-page PDF containing text"""
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+
+
+class TestPdfUtils(unittest.TestCase):
+    def setUp(self):
+        pdf_utils._EXTRACTION_CACHE.clear()
+        self.test_dir = tempfile.mkdtemp(prefix="pdf_utils_test_")
+        self.pdf_paths = []
+        for i in range(3):
+            path = os.path.join(self.test_dir, f"paper_{i}.pdf")
+            make_pdf(path, f"Hello paper number {i}")
+            self.pdf_paths.append(path)
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_pdf_to_markdown(self):
+        """Test single PDF extraction returns (path, text)"""
+        path, text = pdf_to_markdown(self.pdf_paths[0])
+        self.assertEqual(path, self.pdf_paths[0])
+        self.assertIn("Hello paper number 0", text)
+
+    def test_pdf_to_markdown_missing_file(self):
+        """Test extraction errors are returned, not raised"""
+        _, text = pdf_to_markdown(os.path.join(self.test_dir, "missing.pdf"))
+        self.assertTrue(text.startswith("Error"))
+
+    def test_pdf_to_text(self):
+        """Test plain-text extraction returns (path, text)"""
+        path, text = pdf_to_text(self.pdf_paths[0])
+        self.assertEqual(path, self.pdf_paths[0])
+        self.assertIn("Hello paper number 0", text)
+        
+        _, text = pdf_to_text(os.path.join(self.test_dir, "missing.pdf"))
+        self.assertTrue(text.startswith("Error"))
+
+    def test_extract_pdf(self):
+        """Test extraction dispatches on output_format"""
+        for output_format in ("markdown", "text"):
+            text = extract_pdf(self.pdf_paths[1], output_format)
+            self.assertIn("Hello paper number 1", text)
+
+    def test_extract_many(self):
+        """Test process-pool extraction of several PDFs"""
+        for output_format in ("markdown", "text"):
+            results = extract_many(self.pdf_paths, num_workers=2, output_format=output_format)
+            self.assertEqual(set(results), set(self.pdf_paths))
+            for i, path in enumerate(self.pdf_paths):
+                self.assertIn(f"Hello paper number {i}", results[path])
+
+    def test_extract_many_empty(self):
+        """Test empty input"""
+        self.assertEqual(extract_many([]), {})
+
+    def test_extraction_cache(self):
+        """Test identical PDFs are extracted once per output format"""
+        copy_path = os.path.join(self.test_dir, "copy.pdf")
+        shutil.copyfile(self.pdf_paths[0], copy_path)
+        calls = []
+
+        def fake_extract(path):
+            calls.append(path)
+            return path, "cached text"
+
+        with mock.patch.dict(pdf_utils._EXTRACTORS, {"text": fake_extract}):
+            self.assertEqual(extract_pdf(self.pdf_paths[0], "text"), "cached text")
+            self.assertEqual(extract_pdf(copy_path, "text"), "cached text")
+            results = extract_many([self.pdf_paths[0], self.pdf_paths[1]], output_format="text")
+
+        self.assertEqual(calls, [self.pdf_paths[0], self.pdf_paths[1]])
+        self.assertEqual(results[self.pdf_paths[0]], "cached text")
+        self.assertIn("Hello paper number 0", extract_pdf(copy_path, "markdown"))
+
+    def test_error_titled_paper_is_not_a_failure(self):
+        """Test body text starting with "Error" is returned and cached"""
+        path = os.path.join(self.test_dir, "ecc.pdf")
+        make_pdf(path, "Error-Correcting Codes for Flash Memory")
+        for output_format in ("markdown", "text"):
+            text = extract_pdf(path, output_format)
+            self.assertIn("Error-Correcting Codes", text)
+        self.assertEqual(len(pdf_utils._EXTRACTION_CACHE), 2)
+
+    def test_extraction_cache_bounded(self):
+        """Test the cache evicts old entries and skips errors"""
+        with mock.patch.object(pdf_utils, "EXTRACTION_CACHE_SIZE", 2):
+            for path in self.pdf_paths:
+                extract_pdf(path, "text")
+        self.assertEqual(len(pdf_utils._EXTRACTION_CACHE), 2)
+
+        pdf_utils._EXTRACTION_CACHE.clear()
+        with mock.patch.dict(pdf_utils._EXTRACTORS, {"text": lambda path: (path, "Error extracting text: x")}):
+            extract_pdf(self.pdf_paths[0], "text")
+        self.assertEqual(len(pdf_utils._EXTRACTION_CACHE), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
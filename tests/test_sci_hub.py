@@ -3,8 +3,31 @@ import unittest
 import tempfile
 import shutil
 import os
+import threading
 import requests
-from paper_search_mcp.academic_platforms.sci_hub import SciHubFetcher
+from urllib3.exceptions import ReadTimeoutError
+from paper_find_mcp.academic_platforms.sci_hub import SCIHUB_MIRRORS, SciHubFetcher
+
+
+class MockPageResponse:
+    """Streamed response whose raw.read returns body or raises error"""
+
+    def __init__(self, body=b"", status_code=200, error=None):
+        self.status_code = status_code
+        self.raw = self
+        self._body = body
+        self._error = error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def read(self, amt=None, decode_content=None):
+        if self._error:
+            raise self._error
+        return self._body[:amt]
 
 
 def check_sci_hub_accessible():
@@ -36,7 +59,7 @@ class TestSciHubFetcher(unittest.TestCase):
 
     def test_init(self):
         """Test initialization of SciHubFetcher"""
-        self.assertEqual(self.fetcher.base_url, "https://sci-hub.se")
+        self.assertEqual(self.fetcher.base_url, SCIHUB_MIRRORS[0])
         self.assertIsNotNone(self.fetcher.session)
         self.assertEqual(self.fetcher.timeout, 30)
 
@@ -122,6 +145,10 @@ class TestSciHubFetcher(unittest.TestCase):
         filename = self.fetcher._generate_filename("test-paper", response)
         self.assertTrue(filename.endswith('.pdf'))
 
+        # Unsafe characters are replaced, word characters are kept
+        filename = self.fetcher._generate_filename("10.1000/a b:c(é)", response)
+        self.assertTrue(filename.startswith("scihub_10.1000_a_b_c_é__"))
+
     def test_get_pdf_url_with_direct_url(self):
         """Test _get_pdf_url with direct PDF URL"""
         # Method renamed from _get_direct_url to _get_pdf_url
@@ -155,6 +182,186 @@ class TestSciHubFetcher(unittest.TestCase):
         
         # Note: This test may not assert success due to Sci-Hub blocking
 
+    def test_find_pdf_link(self):
+        """Test PDF link extraction from Sci-Hub page layouts"""
+        pages = {
+            '<html><body><embed type="application/pdf" src="//cdn.example.com/a.pdf#view=FitH"></body></html>':
+                "//cdn.example.com/a.pdf#view=FitH",
+            '<html><body><iframe src="/downloads/b.pdf"></iframe></body></html>':
+                "/downloads/b.pdf",
+            '<html><body><button onclick="location.href=\'/c.pdf?download=true\'">save</button></body></html>':
+                "/c.pdf?download=true",
+            '<html><body><a href="/index">home</a><a href="https://x.org/D.PDF">pdf</a></body></html>':
+                "https://x.org/D.PDF",
+            '<html><body><p>nothing here</p></body></html>': None,
+        }
+        for html, expected in pages.items():
+            self.assertEqual(self.fetcher._find_pdf_link_lexbor(html.encode()), expected)
+            self.assertEqual(self.fetcher._find_pdf_link_bs4(html.encode()), expected)
+
+    def test_get_pdf_url_from_page(self):
+        """Test _get_pdf_url regex fast path and DOM fallback on a fetched page"""
+        mirror = "https://sci-hub.example"
+        pages = {
+            '<embed type="application/pdf" src="/tree/ab/paper.pdf#navpanes=0">':
+                mirror + "/tree/ab/paper.pdf#navpanes=0",
+            '<embed src="/tree/ab/paper" type="application/pdf">':
+                mirror + "/tree/ab/paper",
+            '<p>Sorry, article not found</p><a href="/x.pdf">x</a>': None,
+        }
+        for html, expected in pages.items():
+            self.fetcher._fetch_page = lambda doi, html=html: (mirror, html.encode())
+            self.assertEqual(self.fetcher._get_pdf_url("10.1234/test"), expected)
+
+    def test_fetch_page_hedged(self):
+        """Test failing and not-found mirrors don't stop a healthy mirror from winning"""
+        winner = "https://sci-hub.ren"
+        responses = {
+            "https://sci-hub.ru": RuntimeError("unexpected failure"),
+            "https://sci-hub.wf": MockPageResponse(b"<p>Sorry, Article Not Found</p>"),
+            winner: MockPageResponse(b'<embed type="application/pdf" src="/tree/ab/paper.pdf">'),
+            "https://sci-hub.se": MockPageResponse(
+                error=ReadTimeoutError(None, "https://sci-hub.se", "Read timed out.")
+            ),
+            "https://sci-hub.st": MockPageResponse(status_code=503),
+        }
+
+        def fake_get(url, **kwargs):
+            response = responses[url.rsplit("/10.", 1)[0]]
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        self.fetcher.session.get = fake_get
+        mirror, page = self.fetcher._fetch_page("10.1234/test")
+        self.assertEqual(mirror, winner)
+        self.assertIn(b"/tree/ab/paper.pdf", page)
+        self.assertEqual(self.fetcher.base_url, winner)
+        self.assertEqual(self.fetcher._get_pdf_url("10.1234/test"), winner + "/tree/ab/paper.pdf")
+
+        # No mirror has the article: the not-found page is returned
+        del responses[winner]
+        self.fetcher._mirrors.remove(winner)
+        mirror, page = self.fetcher._fetch_page("10.1234/test")
+        self.assertEqual(mirror, "https://sci-hub.wf")
+        self.assertIsNone(self.fetcher._get_pdf_url("10.1234/test"))
+
+        # Losing mirrors skip reading the body once a winner is found
+        finished = threading.Event()
+        finished.set()
+        self.assertIsNone(self.fetcher._fetch_from_mirror("https://sci-hub.wf", "10.1234/test", finished))
+
+    def test_fetch_from_mirror_read_error(self):
+        """Test a mirror stalling mid-body is treated as a failed mirror"""
+        error = ReadTimeoutError(None, "https://sci-hub.ru", "Read timed out.")
+        self.fetcher.session.get = lambda *args, **kwargs: MockPageResponse(error=error)
+        self.assertIsNone(self.fetcher._fetch_from_mirror("https://sci-hub.ru", "10.1234/test"))
+
+    def test_download_pdf_interrupted(self):
+        """Test a download failing mid-stream leaves no partial file"""
+        class InterruptedResponse(MockPageResponse):
+            headers = {}
+
+            def read(self, amt=None, decode_content=None):
+                if self._body:
+                    chunk, self._body = self._body[:amt], self._body[amt:]
+                    return chunk
+                raise ReadTimeoutError(None, "https://cdn.example.com", "Read timed out.")
+
+        self.fetcher._get_pdf_url = lambda doi: "https://cdn.example.com/paper.pdf"
+        self.fetcher.session.get = lambda *args, **kwargs: InterruptedResponse(b"%PDF-1.4 partial")
+        result = self.fetcher.download_pdf("10.1234/test", save_path=self.test_dir)
+        self.assertTrue(result.startswith("Error"))
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+    def test_read_papers_duplicate_dois(self):
+        """Test duplicate DOIs are downloaded once and results keep input order"""
+        import pymupdf
+
+        pdf_path = os.path.join(self.test_dir, "scihub_10.1234_a.pdf")
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), "Duplicate body")
+        doc.save(pdf_path)
+        doc.close()
+
+        downloads = []
+
+        def fake_download(doi, save_path=None):
+            downloads.append(doi)
+            return pdf_path if doi == "10.1234/a" else f"Error: Could not find PDF for DOI {doi} on Sci-Hub"
+
+        self.fetcher.download_pdf = fake_download
+        results = self.fetcher.read_papers(
+            ["10.1234/a", "10.1234/b", " 10.1234/a "], self.test_dir, num_workers=2, output_format="text"
+        )
+        self.assertEqual(sorted(downloads), ["10.1234/a", "10.1234/b"])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], results[2])
+        self.assertIn("Duplicate body", results[0])
+        self.assertTrue(results[1].startswith("Error"))
+
+    def test_format_paper_text(self):
+        """Test only extraction failures skip the metadata header"""
+        text = self.fetcher._format_paper_text("10.1234/a", "a.pdf", "Error-Correcting Codes for Flash Memory")
+        self.assertTrue(text.startswith("# Paper: 10.1234/a"))
+        self.assertIn("Error-Correcting Codes", text)
+        error = self.fetcher._format_paper_text("10.1234/a", "a.pdf", "Error extracting text: broken")
+        self.assertEqual(error, "Error extracting text: broken")
+
+    def test_session_does_not_retry_timeouts(self):
+        """Test a stalled host is tried once; only 502/503/504 are retried by the adapter"""
+        import socket
+
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(8)
+        connections = []
+
+        def accept():
+            while True:
+                try:
+                    connections.append(server.accept()[0])
+                except OSError:
+                    return
+
+        threading.Thread(target=accept, daemon=True).start()
+        try:
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                self.fetcher.session.get(f"http://127.0.0.1:{server.getsockname()[1]}/x", timeout=0.5)
+            self.assertEqual(len(connections), 1)
+        finally:
+            server.close()
+            for conn in connections:
+                conn.close()
+
+    def test_fetch_page_does_not_delay_exit(self):
+        """Test a stalled losing mirror doesn't keep the interpreter alive"""
+        import subprocess
+        import sys
+        import time
+
+        script = (
+            "import time\n"
+            "from paper_find_mcp.academic_platforms.sci_hub import SciHubFetcher\n"
+            "from tests.test_sci_hub import MockPageResponse\n"
+            "fetcher = SciHubFetcher()\n"
+            "def fake_get(url, **kwargs):\n"
+            "    if url.startswith(fetcher.base_url):\n"
+            "        time.sleep(10)\n"
+            "    return MockPageResponse(b'<embed type=\"application/pdf\" src=\"/a.pdf\">')\n"
+            "fetcher.session.get = fake_get\n"
+            "print(fetcher._get_pdf_url('10.1234/test'))\n"
+        )
+        start = time.time()
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True, text=True, timeout=30
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertTrue(result.stdout.strip().endswith("/a.pdf"))
+        self.assertLess(time.time() - start, 8)
+
     def test_session_headers(self):
         """Test that session has proper headers"""
         self.assertIn('User-Agent', self.fetcher.session.headers)
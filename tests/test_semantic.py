@@ -1,7 +1,9 @@
 import unittest
 import os
+import json
 import requests
-from paper_search_mcp.academic_platforms.semantic import SemanticSearcher
+from datetime import datetime
+from paper_find_mcp.academic_platforms.semantic import SemanticSearcher
 
 
 def check_semantic_accessible():
@@ -25,6 +27,184 @@ class TestSemanticSearcher(unittest.TestCase):
     def setUp(self):
         self.searcher = SemanticSearcher()
 
+    def test_parse_date(self):
+        """Test date parsing for full dates, year-only and invalid input"""
+        self.assertEqual(self.searcher._parse_date("2020-03-15"), datetime(2020, 3, 15))
+        self.assertEqual(self.searcher._parse_date(" 2020-03-15 "), datetime(2020, 3, 15))
+        self.assertEqual(self.searcher._parse_date("2019"), datetime(2019, 1, 1))
+        self.assertEqual(self.searcher._parse_date("2019-13-45"), datetime(2019, 1, 1))
+        self.assertIsNone(self.searcher._parse_date(""))
+        self.assertIsNone(self.searcher._parse_date(None))
+        self.assertIsNone(self.searcher._parse_date("n/a"))
+        self.assertEqual(self.searcher._parse_date("2020-1-5"), datetime(2020, 1, 5))
+        self.assertEqual(self.searcher._parse_date("2020-03-15extra"), datetime(2020, 1, 1))
+        self.assertIsNone(self.searcher._parse_date("0000"))
+        self.assertIsNone(self.searcher._parse_date("0000-01-01"))
+        self.assertIsNone(self.searcher._parse_date("\u00b2\u00b2\u00b2\u00b2"))
+        self.assertIsNotNone(self.searcher._parse_paper({"paperId": "x", "publicationDate": "0000-01-01"}))
+
+    def test_get_paper_details_cached(self):
+        """Test repeated detail lookups hit the cache until it expires"""
+        calls = []
+
+        class MockResponse:
+            content = b'{"paperId": "abc123", "title": "Cached Paper"}'
+
+        def fake_request(endpoint, params, **kwargs):
+            calls.append(endpoint)
+            return MockResponse()
+
+        self.searcher._make_request = fake_request
+
+        first = self.searcher.get_paper_details("DOI:10.1234/cached")
+        second = self.searcher.get_paper_details("DOI:10.1234/cached")
+        by_s2_id = self.searcher.get_paper_details("abc123")
+        self.assertEqual(first.title, "Cached Paper")
+        self.assertIs(first, second)
+        self.assertIs(first, by_s2_id)
+        self.assertEqual(len(calls), 1)
+
+        self.searcher.max_age_seconds = 0
+        self.searcher.get_paper_details("DOI:10.1234/cached")
+        self.assertEqual(len(calls), 2)
+
+    def test_get_papers_batch(self):
+        """Test batch lookup chunks IDs, keeps order and skips cached papers"""
+        requests_made = []
+
+        class MockResponse:
+            def __init__(self, ids):
+                self.content = json.dumps([
+                    None if paper_id.startswith("missing") else {"paperId": paper_id, "title": paper_id}
+                    for paper_id in ids
+                ]).encode()
+
+        def fake_request(endpoint, params, method="GET", json=None, **kwargs):
+            self.assertEqual((endpoint, method), ("paper/batch", "POST"))
+            requests_made.append(json["ids"])
+            return MockResponse(json["ids"])
+
+        self.searcher._make_request = fake_request
+        self.searcher.BATCH_SIZE = 2
+
+        ids = ["p1", "missing1", "p2", "p3", "p1"]
+        papers = self.searcher.get_papers_batch(ids)
+        self.assertEqual([p.title if p else None for p in papers], ["p1", None, "p2", "p3", "p1"])
+        self.assertEqual(requests_made, [["p1", "missing1"], ["p2", "p3"]])
+
+        self.searcher.get_papers_batch(["p2", "p4"])
+        self.assertEqual(requests_made[-1], ["p4"])
+
+        self.searcher.max_age_seconds = 0
+        papers = self.searcher.get_papers_batch(["p5"])
+        self.assertEqual(papers[0].title, "p5")
+
+    def test_download_pdf_interrupted(self):
+        """Test a download failing mid-stream leaves no partial file"""
+        import tempfile
+        import shutil
+
+        class MockResponse:
+            headers = {"Content-Type": "application/pdf"}
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                return False
+
+            def raise_for_status(self):
+                pass
+
+            def iter_content(self, chunk_size):
+                yield b"%PDF-1.4 " + b"x" * 2000
+                raise requests.exceptions.ChunkedEncodingError("connection reset")
+
+        paper = self.searcher._parse_paper({
+            "paperId": "abc123",
+            "title": "Interrupted",
+            "openAccessPdf": {"url": "https://example.org/paper.pdf"},
+        })
+        self.searcher._pdf_session.get = lambda *args, **kwargs: MockResponse()
+
+        test_dir = tempfile.mkdtemp(prefix="semantic_partial_test_")
+        try:
+            result = self.searcher.download_pdf("abc123", test_dir, paper=paper)
+            self.assertTrue(result.startswith("Error"))
+            self.assertEqual(os.listdir(test_dir), [])
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_read_paper_text_format(self):
+        """Test output_format is the third positional argument, as in arXiv"""
+        import tempfile
+        import shutil
+        import pymupdf
+
+        test_dir = tempfile.mkdtemp(prefix="semantic_text_test_")
+        pdf_path = os.path.join(test_dir, "semantic_abc123.pdf")
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), "Plain text body")
+        doc.save(pdf_path)
+        doc.close()
+
+        paper = self.searcher._parse_paper({"paperId": "abc123", "title": "Text Mode"})
+        self.searcher.get_paper_details = lambda paper_id: paper
+        self.searcher.download_pdf = lambda paper_id, save_path, paper=None: pdf_path
+        try:
+            result = self.searcher.read_paper("abc123", test_dir, "text")
+            self.assertTrue(result.startswith("# Text Mode"))
+            self.assertIn("Plain text body", result)
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_format_paper_text(self):
+        """Test only extraction failures skip the metadata header"""
+        paper = self.searcher._parse_paper({"paperId": "abc123", "title": "Flash Memory"})
+        text = self.searcher._format_paper_text("abc123", "a.pdf", "Error-Correcting Codes", paper)
+        self.assertTrue(text.startswith("# Flash Memory"))
+        error = self.searcher._format_paper_text("abc123", "a.pdf", "Error extracting text: broken", paper)
+        self.assertEqual(error, "Error extracting text: broken")
+
+    def test_read_papers_duplicate_ids(self):
+        """Test duplicate IDs are downloaded once and results keep input order"""
+        import tempfile
+        import shutil
+        import pymupdf
+
+        test_dir = tempfile.mkdtemp(prefix="semantic_dup_test_")
+        pdf_path = os.path.join(test_dir, "semantic_abc123.pdf")
+        doc = pymupdf.open()
+        doc.new_page().insert_text((72, 72), "Duplicate body")
+        doc.save(pdf_path)
+        doc.close()
+
+        class MockResponse:
+            def __init__(self, ids):
+                self.content = json.dumps([
+                    {"paperId": paper_id, "title": paper_id} for paper_id in ids
+                ]).encode()
+
+        downloads = []
+
+        def fake_download(paper_id, save_path, paper=None):
+            downloads.append(paper_id)
+            return pdf_path if paper_id == "abc123" else f"Error: No PDF URL available for paper {paper_id}"
+
+        self.searcher._make_request = lambda endpoint, params, json=None, **kwargs: MockResponse(json["ids"])
+        self.searcher.download_pdf = fake_download
+        try:
+            results = self.searcher.read_papers(
+                ["abc123", "def456", "abc123"], test_dir, num_workers=2, output_format="text"
+            )
+            self.assertEqual(sorted(downloads), ["abc123", "def456"])
+            self.assertEqual(len(results), 3)
+            self.assertEqual(results[0], results[2])
+            self.assertIn("Duplicate body", results[0])
+            self.assertTrue(results[1].startswith("Error"))
+        finally:
+            shutil.rmtree(test_dir)
+
     @unittest.skipUnless(check_semantic_accessible(), "Semantic Scholar not accessible")
     def test_search_basic(self):
         """Test basic search functionality"""
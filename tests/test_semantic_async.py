@@ -0,0 +1,136 @@
+# tests/test_semantic_async.py
+import unittest
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import httpx
+from paper_find_mcp.academic_platforms.semantic_async import AsyncSemanticSearcher
+from tests.test_semantic import check_semantic_accessible
+
+
+PDF_BODY = b"%PDF-1.4\n" + b"0" * 4096
+
+
+class FailingStream(httpx.AsyncByteStream):
+    """Response body that breaks after the first chunk"""
+
+    async def __aiter__(self):
+        # A full 1 MiB block so adownload_pdf starts writing before the error
+        yield PDF_BODY.ljust(1 << 20, b"0")
+        raise httpx.ReadError("connection reset")
+
+
+class TestAsyncSemanticSearcher(unittest.TestCase):
+    def setUp(self):
+        self.searcher = AsyncSemanticSearcher(concurrency=2)
+        self.searcher.min_request_interval = 0
+        self.test_dir = tempfile.mkdtemp(prefix="semantic_async_test_")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_with_transport(self, handler, coro_factory):
+        """Run a coroutine with the AsyncClient backed by httpx.MockTransport"""
+        async def run():
+            self.searcher._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            self.searcher._client_loop = asyncio.get_running_loop()
+            self.searcher._rate_lock = asyncio.Lock()
+            async with self.searcher:
+                return await coro_factory()
+
+        return asyncio.run(run())
+
+    def test_adownload_pdf_interrupted(self):
+        """Test a stream failing after the first chunk leaves no file"""
+        def handler(request):
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, stream=FailingStream())
+
+        paper = self.searcher._parse_paper({
+            "paperId": "abc123",
+            "title": "Interrupted",
+            "openAccessPdf": {"url": "https://pdf.example.org/abc123.pdf"},
+        })
+        result = self.run_with_transport(
+            handler, lambda: self.searcher.adownload_pdf("abc123", self.test_dir, paper=paper)
+        )
+        self.assertTrue(result.startswith("Error"))
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+    def test_download_many_keeps_order(self):
+        """Test batch lookup plus concurrent downloads keep input order and skip duplicates"""
+        batch_requests = []
+        pdf_requests = []
+
+        async def handler(request):
+            if request.url.path.endswith("/paper/batch"):
+                ids = json.loads(request.content)["ids"]
+                batch_requests.append(ids)
+                return httpx.Response(200, json=[
+                    None if paper_id == "missing" else {
+                        "paperId": paper_id,
+                        "title": paper_id,
+                        "openAccessPdf": {"url": f"https://pdf.example.org/{paper_id}.pdf"},
+                    }
+                    for paper_id in ids
+                ])
+            pdf_requests.append(request.url.path)
+            # Earlier papers finish last
+            await asyncio.sleep(0.05 if "p1" in request.url.path else 0)
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=PDF_BODY)
+
+        ids = ["p1", "missing", "p2", "p1"]
+        results = self.run_with_transport(
+            handler, lambda: self.searcher.download_many(ids, self.test_dir)
+        )
+        self.assertEqual(batch_requests, [["p1", "missing", "p2"]])
+        self.assertEqual(sorted(pdf_requests), ["/p1.pdf", "/p2.pdf"])
+        self.assertEqual(results[0], os.path.join(self.test_dir, "semantic_p1.pdf"))
+        self.assertTrue(results[1].startswith("Error"))
+        self.assertEqual(results[2], os.path.join(self.test_dir, "semantic_p2.pdf"))
+        self.assertEqual(results[3], results[0])
+        self.assertEqual(sorted(os.listdir(self.test_dir)), ["semantic_p1.pdf", "semantic_p2.pdf"])
+
+    def test_gather_keeps_order_and_bounds_concurrency(self):
+        """Test _gather returns results in input order with bounded concurrency"""
+        running = 0
+        peak = 0
+
+        async def job(i):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - i))
+            running -= 1
+            return i
+
+        results = asyncio.run(self.searcher._gather(job(i) for i in range(5)))
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+        self.assertLessEqual(peak, 2)
+
+    @unittest.skipUnless(check_semantic_accessible(), "Semantic Scholar not accessible")
+    def test_get_details_many(self):
+        """Test concurrent paper detail lookup"""
+        paper_ids = [
+            "5bbfdf2e62f0508c65ba6de9c72fe2066fd98138",
+            "DOI:10.18653/v1/N18-3011",
+        ]
+
+        async def run():
+            async with self.searcher:
+                return await self.searcher.get_details_many(paper_ids)
+
+        start_time = time.time()
+        papers = asyncio.run(run())
+        print(f"\nFetched {len(papers)} papers in {time.time() - start_time:.2f}s")
+
+        self.assertEqual(len(papers), len(paper_ids))
+        for paper in papers:
+            if paper:
+                self.assertEqual(paper.source, "semantic")
+
+
+if __name__ == "__main__":
+    unittest.main()